@@ -2,6 +2,8 @@ import requests
 import json
 import os
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 
 # --- Configuration ---
 # Placeholder for API key. In a real application, use environment variables or a config file.
@@ -12,9 +14,25 @@ TO_CURRENCY = 'KRW'
 # Alpha Vantage API endpoint
 ALPHA_VANTAGE_URL = 'https://www.alphavantage.co/query'
 
-def fetch_fx_data(api_key, from_currency, to_currency, interval='10min', outputsize='compact'):
+# Fixed-shape JSON output, laid out exactly like json.dumps(generate_json_output(...), indent=4)
+JSON_OUTPUT_TEMPLATE = """{{
+    "timestamp": "{timestamp}",
+    "from_currency": "{from_currency}",
+    "to_currency": "{to_currency}",
+    "rate": {rate},
+    "predictions": {{
+        "short_term": "{short_term}",
+        "long_term": "{long_term}"
+    }}
+}}"""
+
+# Maximum number of Alpha Vantage requests in flight at once (keeps the free tier's rate limit in reach)
+MAX_CONCURRENT_REQUESTS = 2
+
+def fetch_fx_data(api_key, from_currency, to_currency, interval='10min', outputsize='compact', session=None):
     """
     Fetches intraday FX data from Alpha Vantage.
+    An optional requests.Session can be passed to reuse pooled connections across calls.
     """
     params = {
         'function': 'FX_INTRADAY',
@@ -25,7 +43,8 @@ def fetch_fx_data(api_key, from_currency, to_currency, interval='10min', outputs
         'apikey': api_key,
     }
     try:
-        response = requests.get(ALPHA_VANTAGE_URL, params=params)
+        http = session if session is not None else requests
+        response = http.get(ALPHA_VANTAGE_URL, params=params)
         response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
         data = response.json()
         if "Error Message" in data:
@@ -46,55 +65,73 @@ def fetch_fx_data(api_key, from_currency, to_currency, interval='10min', outputs
         print("Error decoding JSON response from Alpha Vantage.")
         return None
 
-def calculate_moving_average(data, window):
+def sma(prices, window):
+    """
+    Calculates the simple moving average series of a NumPy price array using a
+    single cumulative sum, so each window costs two subtractions and a divide.
+    """
+    cumulative = np.concatenate(([0.0], np.cumsum(prices)))
+    return (cumulative[window:] - cumulative[:-window]) / window
+
+def latest_moving_average(prices, window):
+    """
+    Calculates only the most recent window average, without building the full series.
+    """
+    return prices[-window:].sum() / window
+
+def calculate_moving_average(data, window, latest_only=False):
     """
     Calculates the moving average for a list of prices.
+    With latest_only=True, returns just the most recent average (or None if there is not enough data).
     """
-    if len(data) < window:
-        return []
-    moving_averages = []
-    for i in range(len(data) - window + 1):
-        window_slice = data[i : i + window]
-        window_average = sum(window_slice) / window
-        moving_averages.append(window_average)
-    return moving_averages
+    if window == 0:
+        raise ZeroDivisionError("Moving average window must be non-zero.")
+    if window < 0 or len(data) < window:
+        return None if latest_only else []
+    prices = np.asarray(data, dtype=np.float64)
+    if latest_only:
+        return float(latest_moving_average(prices, window))
+    return sma(prices, window).tolist()
+
+def iter_closing_prices(items):
+    """
+    Yields the closing price of each (timestamp, values) pair, skipping malformed data points.
+    """
+    for ts, values in items:
+        try:
+            yield float(values['4. close'])
+        except KeyError:
+            print(f"Could not find '4. close' for timestamp {ts}. Skipping this data point.")
+        except ValueError:
+            print(f"Could not convert closing price to float for timestamp {ts}. Skipping this data point.")
 
-def get_predictions(api_key, from_currency, to_currency):
+def get_predictions(api_key, from_currency, to_currency, session=None):
     """
     Fetches data, calculates MAs, and generates predictions.
     """
     # Fetch data with 'compact' to get 100 data points, '10min' interval for MAs
-    raw_data = fetch_fx_data(api_key, from_currency, to_currency, interval='10min', outputsize='compact')
+    raw_data = fetch_fx_data(api_key, from_currency, to_currency, interval='10min', outputsize='compact', session=session)
 
     if not raw_data:
         print("Failed to fetch data for predictions.")
         return None, None, None, None
 
-    # Extract closing prices and timestamps. Data is usually newest first.
-    # We need to reverse it for MA calculation if the MA function expects chronological order.
-    timestamps = sorted(raw_data.keys()) # Sort to ensure chronological order
+    # Extract closing prices and timestamps. Data is usually newest first, so sort the
+    # (timestamp, values) pairs once to get the chronological order the MAs expect.
+    items = sorted(raw_data.items(), key=lambda item: item[0])
     
-    if not timestamps:
+    if not items:
         print("No timestamps found in the fetched data.")
         return None, None, None, None
 
-    closing_prices = []
-    for ts in timestamps:
-        try:
-            closing_prices.append(float(raw_data[ts]['4. close']))
-        except KeyError:
-            print(f"Could not find '4. close' for timestamp {ts}. Skipping this data point.")
-            continue
-        except ValueError:
-            print(f"Could not convert closing price to float for timestamp {ts}. Skipping this data point.")
-            continue
+    closing_prices = np.fromiter(iter_closing_prices(items), dtype=np.float64)
     
-    if not closing_prices:
+    if closing_prices.size == 0:
         print("No valid closing prices could be extracted.")
         return None, None, None, None
 
-    latest_rate = closing_prices[-1] # The last price in the chronological list is the latest
-    latest_timestamp = timestamps[-1]
+    latest_rate = float(closing_prices[-1]) # The last price in the chronological list is the latest
+    latest_timestamp = items[-1][0]
 
     # Define MA periods
     short_window = 5
@@ -102,27 +139,17 @@ def get_predictions(api_key, from_currency, to_currency):
     long_window = 60
 
     # Calculate MAs
-    # The calculate_moving_average function expects data to be in chronological order,
-    # and it returns MAs where the last element corresponds to the most recent period.
-    
-    # For a list of prices P = [p1, p2, ..., pN] (chronological)
-    # MA_short = calculate_moving_average(P, short_window) -> [sma_s1, sma_s2, ..., sma_s_latest]
-    # MA_medium = calculate_moving_average(P, medium_window) -> [sma_m1, sma_m2, ..., sma_m_latest]
-    # MA_long = calculate_moving_average(P, long_window) -> [sma_l1, sma_l2, ..., sma_l_latest]
-
-    ma_short_series = calculate_moving_average(closing_prices, short_window)
-    ma_medium_series = calculate_moving_average(closing_prices, medium_window)
-    ma_long_series = calculate_moving_average(closing_prices, long_window)
-
-    if not ma_short_series or not ma_medium_series or not ma_long_series:
+    # The prices are in chronological order and only the most recent average
+    # of each window is needed, so average just the trailing prices.
+    if len(closing_prices) < long_window:
         print("Not enough data to calculate all moving averages.")
         # Still return latest rate if available, but predictions will be NEUTRAL
         return latest_rate, "NEUTRAL", "NEUTRAL", latest_timestamp
 
     # Get the latest MAs
-    latest_ma_short = ma_short_series[-1]
-    latest_ma_medium = ma_medium_series[-1]
-    latest_ma_long = ma_long_series[-1]
+    latest_ma_short = latest_moving_average(closing_prices, short_window)
+    latest_ma_medium = latest_moving_average(closing_prices, medium_window)
+    latest_ma_long = latest_moving_average(closing_prices, long_window)
 
     # Short-term prediction
     short_term_prediction = "NEUTRAL"
@@ -140,6 +167,20 @@ def get_predictions(api_key, from_currency, to_currency):
 
     return latest_rate, short_term_prediction, long_term_prediction, latest_timestamp
 
+def get_predictions_many(api_key, currency_pairs, max_workers=MAX_CONCURRENT_REQUESTS):
+    """
+    Runs get_predictions for several (from_currency, to_currency) pairs concurrently over one shared session.
+    Returns a dict mapping each pair to its get_predictions result tuple.
+    """
+    currency_pairs = list(currency_pairs)
+    with requests.Session() as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda pair: get_predictions(api_key, pair[0], pair[1], session=session),
+                currency_pairs
+            )
+            return dict(zip(currency_pairs, results))
+
 def generate_json_output(latest_rate, short_term_prediction, long_term_prediction, from_currency, to_currency, timestamp_str):
     """
     Generates a JSON object with the FX data and predictions.
@@ -156,6 +197,20 @@ def generate_json_output(latest_rate, short_term_prediction, long_term_predictio
     }
     return output
 
+def format_json_output(latest_rate, short_term_prediction, long_term_prediction, from_currency, to_currency, timestamp_str):
+    """
+    Renders the same record as generate_json_output directly as indented JSON text,
+    skipping the general-purpose JSON encoder since the schema is fixed.
+    """
+    return JSON_OUTPUT_TEMPLATE.format(
+        timestamp=timestamp_str,
+        from_currency=from_currency,
+        to_currency=to_currency,
+        rate="null" if latest_rate is None else repr(float(latest_rate)),
+        short_term=short_term_prediction,
+        long_term=long_term_prediction
+    )
+
 if __name__ == "__main__":
     # --- Configuration (using hardcoded values as per instruction, ideally use env vars) ---
     API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY', 'YOUR_API_KEY_REPLACE_ME') # Replace with your actual key or set env var
@@ -165,27 +220,22 @@ if __name__ == "__main__":
     print(f"Attempting to fetch FX data for {FROM_CURRENCY} to {TO_CURRENCY}...")
     latest_rate, short_term_pred, long_term_pred, latest_timestamp = get_predictions(API_KEY, FROM_CURRENCY, TO_CURRENCY)
 
-    output_data = {}
+    output_text = ""
     current_time_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     if latest_rate is not None and latest_timestamp is not None:
         # Ensure timestamp from API is used if available, otherwise use current time for error.
-        # Alpha Vantage timestamps might not have seconds, adjust format if needed.
-        # Assuming latest_timestamp is in "YYYY-MM-DD HH:MM:SS" or "YYYY-MM-DD HH:MM"
+        # Alpha Vantage timestamps are either "YYYY-MM-DD HH:MM:SS" or "YYYY-MM-DD HH:MM",
+        # so pick the format from the string length instead of trying both.
+        timestamp_format = "%Y-%m-%d %H:%M:%S" if len(latest_timestamp) == 19 else "%Y-%m-%d %H:%M"
         try:
-            # Attempt to parse and reformat if it includes seconds
-            parsed_timestamp = datetime.strptime(latest_timestamp, "%Y-%m-%d %H:%M:%S")
+            parsed_timestamp = datetime.strptime(latest_timestamp, timestamp_format)
             timestamp_str_for_json = parsed_timestamp.strftime("%Y-%m-%d %H:%M:%S")
         except ValueError:
-            # If it's "YYYY-MM-DD HH:MM", add ":00" for seconds
-            try:
-                parsed_timestamp = datetime.strptime(latest_timestamp, "%Y-%m-%d %H:%M")
-                timestamp_str_for_json = parsed_timestamp.strftime("%Y-%m-%d %H:%M:00")
-            except ValueError:
-                print(f"Warning: Could not parse API timestamp '{latest_timestamp}'. Using current time for output.")
-                timestamp_str_for_json = current_time_str
+            print(f"Warning: Could not parse API timestamp '{latest_timestamp}'. Using current time for output.")
+            timestamp_str_for_json = current_time_str
         
-        output_data = generate_json_output(latest_rate, short_term_pred, long_term_pred, FROM_CURRENCY, TO_CURRENCY, timestamp_str_for_json)
+        output_text = format_json_output(latest_rate, short_term_pred, long_term_pred, FROM_CURRENCY, TO_CURRENCY, timestamp_str_for_json)
         print("Successfully fetched and processed FX data.")
     else:
         print("Failed to fetch or process FX data. Generating error output.")
@@ -200,16 +250,17 @@ if __name__ == "__main__":
             },
             "error": "Failed to retrieve or process FX data from Alpha Vantage. Check API key, network, or symbol validity."
         }
+        output_text = json.dumps(output_data, indent=4)
 
     # Print JSON to standard output
     print("\n--- FX Data JSON Output ---")
-    print(json.dumps(output_data, indent=4))
+    print(output_text)
 
     # Write JSON to file
     output_filename = 'fx_data.json'
     try:
         with open(output_filename, 'w') as f:
-            json.dump(output_data, f, indent=4)
+            f.write(output_text)
         print(f"\nSuccessfully wrote FX data to {output_filename}")
     except IOError as e:
         print(f"\nError writing FX data to {output_filename}: {e}")
@@ -0,0 +1,121 @@
+import os
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+import requests
+
+from _http import batch_download, strip_timezone
+
+# 히스토리 캐시 디렉토리 및 유효 시간 (초)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'history')
+CACHE_TTL_SECONDS = 300
+
+# 증분 요청을 사용할 캐시의 최대 공백
+INCREMENTAL_MAX_GAP = pd.Timedelta(days=5)
+
+def _cache_path(yf_symbol: str) -> str:
+    return os.path.join(CACHE_DIR, yf_symbol + '.pkl')
+
+def load_cached(yf_symbol: str) -> Optional[pd.DataFrame]:
+    """저장된 히스토리 캐시가 있으면 로드합니다."""
+    try:
+        return strip_timezone(pd.read_pickle(_cache_path(yf_symbol)))
+    except Exception:
+        return None
+
+def is_cache_fresh(yf_symbol: str) -> bool:
+    """히스토리 캐시가 유효 시간 내에 갱신되었는지 확인합니다."""
+    try:
+        return time.time() - os.path.getmtime(_cache_path(yf_symbol)) <= CACHE_TTL_SECONDS
+    except OSError:
+        return False
+
+def save_cached(yf_symbol: str, hist: pd.DataFrame, days: int) -> None:
+    """days일 기간으로 받은 히스토리 데이터를 캐시에 저장합니다."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # 캐시 파일은 심볼별로 하나이므로, 어느 기간까지 담고 있는지 함께 저장
+    hist.attrs['days'] = days
+    hist.to_pickle(_cache_path(yf_symbol))
+
+def cached_days(cached: Optional[pd.DataFrame]) -> int:
+    """캐시가 담고 있는 기간(일)을 반환합니다. 기간 정보가 없는 캐시는 0입니다."""
+    return 0 if cached is None else cached.attrs.get('days', 0)
+
+def covers_days(cached: Optional[pd.DataFrame], days: int) -> bool:
+    """캐시가 요청한 days일 기간을 모두 담고 있는지 확인합니다."""
+    return cached is not None and cached_days(cached) >= days
+
+def incremental_start(cached: Optional[pd.DataFrame]) -> Optional[pd.Timestamp]:
+    """캐시가 충분히 최근이면 증분 요청을 시작할 날짜를, 아니면 None을 반환합니다."""
+    if cached is None or cached.empty:
+        return None
+    last_date = cached.index[-1]
+    if pd.Timestamp.now() - last_date > INCREMENTAL_MAX_GAP:
+        return None
+    return last_date - pd.Timedelta(days=1)
+
+def log_stale(yf_symbol: str, cached: pd.DataFrame) -> None:
+    """최신 데이터를 받지 못해 오래된 캐시를 사용한다는 사실을 기록합니다."""
+    print(f"No new data for {yf_symbol}, using stale cache up to {cached.index[-1].strftime('%Y-%m-%d')}")
+
+def merge_history(cached: pd.DataFrame, recent: Optional[pd.DataFrame], days: int) -> pd.DataFrame:
+    """캐시된 히스토리에 최근 데이터를 병합하고 최근 days개 행만 유지합니다."""
+    if recent is None or recent.empty:
+        return cached
+    merged = pd.concat([cached, recent])
+    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+    return merged.tail(days)
+
+def load_histories(yf_symbols: List[str], session: Optional[requests.Session], days: int) -> Dict[str, pd.DataFrame]:
+    """여러 심볼의 히스토리를 캐시와 일괄 요청으로 가져옵니다. 캐시가 최근이면 누락된 최근 구간만 요청합니다."""
+    histories = {}
+    full = []
+    incremental = []
+    cached_histories = {}
+    
+    for yf_symbol in yf_symbols:
+        cached = load_cached(yf_symbol)
+        if not covers_days(cached, days):
+            # 더 짧은 기간으로 저장된 캐시는 증분 요청으로도 앞부분을 채울 수 없으므로 전체 기간을 다시 요청
+            full.append(yf_symbol)
+            continue
+        
+        if is_cache_fresh(yf_symbol):
+            histories[yf_symbol] = cached.tail(days)
+            continue
+        
+        if incremental_start(cached) is None:
+            full.append(yf_symbol)
+        else:
+            incremental.append(yf_symbol)
+            cached_histories[yf_symbol] = cached
+    
+    # 캐시가 없는 심볼은 전체 기간을, 캐시가 최근인 심볼은 가장 오래된 마지막 날짜 이후만 요청
+    batches = []
+    if full:
+        batches.append((full, {'period': f"{days}d"}))
+    if incremental:
+        start = min(incremental_start(cached_histories[yf_symbol]) for yf_symbol in incremental)
+        batches.append((incremental, {'start': start.strftime('%Y-%m-%d')}))
+    
+    for group, kwargs in batches:
+        downloaded = batch_download(group, session, **kwargs)
+        for yf_symbol in group:
+            hist = downloaded.get(yf_symbol)
+            keep_days = days
+            if yf_symbol in cached_histories:
+                cached = cached_histories[yf_symbol]
+                if hist is None or hist.empty:
+                    # 갱신에 실패하면 오래된 캐시를 그대로 쓰되, 다음 실행에서 다시 요청하도록 캐시는 저장하지 않음
+                    log_stale(yf_symbol, cached)
+                    histories[yf_symbol] = cached.tail(days)
+                    continue
+                # 다른 스크립트가 더 긴 기간으로 저장한 캐시라면 그 기간을 유지
+                keep_days = max(days, cached_days(cached))
+                hist = merge_history(cached, hist, keep_days)
+            if hist is not None and len(hist) > 1:
+                save_cached(yf_symbol, hist, keep_days)
+                histories[yf_symbol] = hist.tail(days)
+    
+    return histories
@@ -0,0 +1,102 @@
+import threading
+import time
+from typing import Dict, List
+
+import pandas as pd
+import requests
+import yfinance as yf
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 연결 풀 크기 (병렬 작업자와 yf.download 내부 스레드가 모두 연결을 재사용할 수 있도록)
+POOL_SIZE = 16
+
+class RateLimiter:
+    """여러 스레드가 공유하는 요청 간 최소 간격 제한기입니다."""
+
+    def __init__(self, per_minute: float):
+        self.min_interval = 60.0 / per_minute
+        self.last = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        """직전 요청 이후 최소 간격이 지날 때까지만 대기합니다."""
+        with self.lock:
+            elapsed = time.monotonic() - self.last
+            if elapsed < self.min_interval:
+                time.sleep(self.min_interval - elapsed)
+            self.last = time.monotonic()
+
+def create_session() -> requests.Session:
+    """재시도 로직과 적절한 헤더가 포함된 요청 세션을 생성합니다."""
+    session = requests.Session()
+    
+    # 재시도 설정 (호출부에서 별도로 재시도하지 않으므로 GET 요청은 여기서만 재시도)
+    retry = Retry(
+        total=5,
+        backoff_factor=0.2,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset(['GET']),
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    
+    # 브라우저와 유사한 헤더 설정
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive',
+    })
+    
+    try:
+        # Yahoo Finance 쿠키 획득
+        session.get('https://fc.yahoo.com/')
+        
+        # Crumb 획득 시도
+        crumb_response = session.get('https://query2.finance.yahoo.com/v1/test/getcrumb')
+        if crumb_response.status_code == 200:
+            session.headers.update({'X-Yahoo-Api-Crumb': crumb_response.text})
+    except Exception as e:
+        print(f"Warning: Failed to get Yahoo Finance crumb: {str(e)}")
+    
+    return session
+
+# Yahoo Finance 요청 제한 (분당 요청 수)
+yahoo_limiter = RateLimiter(per_minute=120)
+
+def strip_timezone(hist: pd.DataFrame) -> pd.DataFrame:
+    """캐시와 병합할 수 있도록 인덱스의 시간대 정보를 제거합니다."""
+    if getattr(hist.index, 'tz', None) is not None:
+        hist = hist.copy()
+        hist.index = hist.index.tz_localize(None)
+    return hist
+
+def batch_download(yf_symbols: List[str], session: requests.Session, **kwargs) -> Dict[str, pd.DataFrame]:
+    """여러 심볼을 한 번의 yf.download 요청으로 가져와 심볼별 히스토리로 나눕니다."""
+    try:
+        print(f"Downloading {len(yf_symbols)} symbols in one batch")
+        yahoo_limiter.wait()
+        data = yf.download(
+            ' '.join(yf_symbols),
+            group_by='ticker',
+            threads=True,
+            progress=False,
+            session=session,
+            **kwargs,
+        )
+    except Exception as e:
+        print(f"Batch download failed: {str(e)}")
+        return {}
+    
+    if data is None or data.empty:
+        return {}
+    
+    downloaded = set(data.columns.get_level_values(0))
+    return {
+        yf_symbol: strip_timezone(data[yf_symbol].dropna(subset=['Close']))
+        for yf_symbol in yf_symbols
+        if yf_symbol in downloaded
+    }
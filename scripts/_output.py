@@ -0,0 +1,66 @@
+import codecs
+import json
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 호가 통화별 환율 소수 자릿수 (그 외 통화는 4자리)
+QUOTE_DECIMALS = {'JPY': 2, 'KRW': 2}
+
+# 단위 가치가 매우 낮아 자릿수를 더 두어야 하는 기준 통화 (예: VND/KRW ≈ 0.055)
+BASE_EXTRA_DECIMALS = {'VND': 2}
+
+
+def rate_decimals(symbol: str) -> int:
+    """통화쌍(예: USD/KRW)의 환율을 저장할 때 사용할 소수 자릿수를 반환합니다."""
+    base, quote = symbol.split('/')
+    return QUOTE_DECIMALS.get(quote, 4) + BASE_EXTRA_DECIMALS.get(base, 0)
+
+
+def encode_json(data: Any) -> bytes:
+    """데이터를 들여쓰기 2칸의 UTF-8 JSON 바이트로 직렬화합니다."""
+    # orjson이 설치되어 있으면 사용하고, 없으면 표준 json으로 직렬화
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _with_prefix(payload: bytes, bom: bool) -> bytes:
+    """필요하면 UTF-8 BOM을 앞에 붙입니다."""
+    return codecs.BOM_UTF8 + payload if bom else payload
+
+
+def write_json(file_path: str, data: Dict[str, Any], bom: bool = False, volatile_key: Optional[str] = None) -> bool:
+    """데이터를 JSON 파일로 저장합니다. bom=True이면 UTF-8 BOM을 붙입니다.
+
+    기존 파일과 내용이 같으면 쓰지 않고 False를 반환합니다. volatile_key로 지정한
+    최상위 필드(실행 시각 등)는 비교에서 제외하며, 건너뛸 때는 기존 값이 유지됩니다.
+    """
+    payload = _with_prefix(encode_json(data), bom)
+    
+    try:
+        with open(file_path, 'rb') as f:
+            existing = f.read()
+    except OSError:
+        existing = None
+    
+    if existing is not None:
+        if existing == payload:
+            return False
+        if volatile_key is not None and volatile_key in data:
+            try:
+                previous = json.loads(existing.decode('utf-8-sig'))
+            except ValueError:
+                previous = None
+            if isinstance(previous, dict) and volatile_key in previous:
+                # 기존 값으로 바꿔 직렬화한 결과가 같으면 실제 변경 사항이 없는 것
+                unchanged = _with_prefix(encode_json({**data, volatile_key: previous[volatile_key]}), bom)
+                if unchanged == existing:
+                    return False
+    
+    with open(file_path, 'wb') as f:
+        f.write(payload)
+    return True
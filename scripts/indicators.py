@@ -0,0 +1,58 @@
+from typing import Tuple
+
+import numpy as np
+
+# 모든 함수는 시간 축(axis 0)을 따라 계산하므로, 1차원 종가 배열과
+# (날짜 x 통화쌍) 2차원 종가 행렬을 모두 받을 수 있습니다.
+
+def _smoothed_last(seed: np.ndarray, values: np.ndarray, alpha: float) -> np.ndarray:
+    """점화식 s = alpha * x + (1 - alpha) * s를 seed에서 시작해 values에 적용한 마지막 값을 계산합니다."""
+    # 점화식을 펼친 닫힌 형태: s_n = (1 - alpha)^n * seed + Σ alpha * (1 - alpha)^(n-1-i) * x_i
+    decay = (1 - alpha) ** np.arange(len(values) - 1, -1, -1)
+    return (1 - alpha) ** len(values) * seed + alpha * np.tensordot(decay, values, axes=(0, 0))
+
+def sma_tail(values: np.ndarray, window: int) -> np.ndarray:
+    """마지막 window개 값의 단순이동평균을 계산합니다."""
+    # 마지막 값과의 차이를 평균하여, 값이 모두 같으면 반올림 오차 없이 그 값을 반환
+    last = values[-1]
+    return last + (values[-window:] - last).mean(axis=0)
+
+def ema_last(values: np.ndarray, span: int) -> np.ndarray:
+    """지수이동평균(ewm(adjust=False))의 마지막 값만 계산합니다."""
+    alpha = 2.0 / (span + 1)
+    # 첫 값과의 차이에 점화식을 적용하여, 값이 모두 같으면 반올림 오차 없이 그 값을 반환
+    first = values[0]
+    return first + _smoothed_last(first - first, values[1:] - first, alpha)
+
+def rsi_last(values: np.ndarray, window: int = 14) -> np.ndarray:
+    """Wilder 평활(첫 window개 변동분의 평균에서 시작해 α = 1/window로 갱신)로 마지막 RSI를 계산합니다."""
+    delta = np.diff(values, axis=0)
+    if len(delta) < window:
+        return np.full(values.shape[1:], np.nan)
+    
+    gains = np.maximum(delta, 0)
+    losses = np.maximum(-delta, 0)
+    avg_gain = _smoothed_last(gains[:window].mean(axis=0), gains[window:], 1.0 / window)
+    avg_loss = _smoothed_last(losses[:window].mean(axis=0), losses[window:], 1.0 / window)
+    
+    # 100 - 100 / (1 + RS)를 한 번의 나눗셈으로 계산 (분모는 변동이 전혀 없을 때만 0)
+    with np.errstate(invalid='ignore'):
+        rsi = 100.0 * avg_gain / (avg_gain + avg_loss)
+    
+    # 하락폭이 없으면 기존과 같이 중립값 50을 사용
+    return np.where(avg_loss == 0, 50.0, rsi)
+
+def signal_indicators(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """신호 판단에 쓰이는 MA5, MA20, MA60, RSI(14), MACD(12, 26)의 마지막 값을 한 번에 계산합니다."""
+    ma5 = sma_tail(values, 5)
+    ma20 = sma_tail(values, 20)
+    ma60 = sma_tail(values, 60)
+    rsi = rsi_last(values, 14)
+    
+    # MACD는 26개 이상의 종가가 있을 때만 계산
+    if len(values) >= 26:
+        macd = ema_last(values, 12) - ema_last(values, 26)
+    else:
+        macd = np.zeros(values.shape[1:])
+    
+    return ma5, ma20, ma60, rsi, macd
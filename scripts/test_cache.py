@@ -0,0 +1,116 @@
+import unittest
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+import _cache
+from _cache import load_histories, merge_history
+
+
+def _history(start, periods, offset=0.0):
+    index = pd.bdate_range(start=start, periods=periods)
+    return pd.DataFrame({'Close': np.arange(periods, dtype=np.float64) + offset}, index=index)
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        patcher = patch.object(_cache, 'CACHE_DIR', self.cache_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.cache_dir.cleanup)
+
+    # --- Tests for merge_history ---
+    def test_merge_history_prefers_recent_rows_on_overlap(self):
+        cached = _history('2025-01-01', 10)
+        recent = _history(cached.index[-2], 4, offset=100.0)
+        merged = merge_history(cached, recent, 20)
+
+        self.assertTrue(merged.index.is_unique)
+        self.assertTrue(merged.index.is_monotonic_increasing)
+        self.assertEqual(len(merged), 12)
+        self.assertEqual(merged['Close'].iloc[-4:].tolist(), recent['Close'].tolist())
+
+    def test_merge_history_keeps_last_days_rows(self):
+        cached = _history('2025-01-01', 10)
+        recent = _history(cached.index[-1] + pd.offsets.BDay(), 5, offset=100.0)
+        merged = merge_history(cached, recent, 8)
+
+        self.assertEqual(len(merged), 8)
+        self.assertEqual(merged.index[-1], recent.index[-1])
+        self.assertEqual(merged.index[0], cached.index[7])
+
+    def test_merge_history_without_recent_rows_returns_cache(self):
+        cached = _history('2025-01-01', 10)
+        self.assertIs(merge_history(cached, None, 20), cached)
+        self.assertIs(merge_history(cached, cached.iloc[:0], 20), cached)
+
+    # --- Tests for load_histories ---
+    def _recent_cache(self, periods=20, days=150):
+        # 증분 요청 대상이 되도록 최근 날짜로 끝나는 캐시
+        cached = _history(pd.Timestamp.now().normalize() - pd.offsets.BDay(periods), periods)
+        _cache.save_cached('USDKRW=X', cached, days)
+        return cached
+
+    @patch('_cache.is_cache_fresh', return_value=False)
+    @patch('_cache.batch_download', return_value={})
+    def test_failed_refresh_uses_stale_cache_without_saving(self, mock_download, mock_fresh):
+        cached = self._recent_cache()
+        with patch('_cache.save_cached') as mock_save:
+            histories = load_histories(['USDKRW=X'], None, 150)
+
+        mock_download.assert_called_once()
+        self.assertIn('start', mock_download.call_args.kwargs)
+        mock_save.assert_not_called()
+        pd.testing.assert_frame_equal(histories['USDKRW=X'], cached, check_freq=False)
+
+    @patch('_cache.is_cache_fresh', return_value=False)
+    def test_successful_refresh_saves_merged_history(self, mock_fresh):
+        cached = self._recent_cache()
+        recent = _history(cached.index[-1] + pd.offsets.BDay(), 2, offset=100.0)
+        with patch('_cache.batch_download', return_value={'USDKRW=X': recent}), \
+                patch('_cache.save_cached') as mock_save:
+            histories = load_histories(['USDKRW=X'], None, 150)
+
+        mock_save.assert_called_once()
+        self.assertEqual(len(histories['USDKRW=X']), 22)
+
+    @patch('_cache.is_cache_fresh', return_value=True)
+    def test_fresh_cache_for_shorter_period_is_refetched(self, mock_fresh):
+        self._recent_cache(days=150)
+        full = _history('2025-01-01', 160)
+        with patch('_cache.batch_download', return_value={'USDKRW=X': full}) as mock_download:
+            histories = load_histories(['USDKRW=X'], None, 160)
+
+        self.assertEqual(mock_download.call_args.kwargs, {'period': '160d'})
+        self.assertEqual(len(histories['USDKRW=X']), 160)
+        self.assertEqual(_cache.cached_days(_cache.load_cached('USDKRW=X')), 160)
+
+    @patch('_cache.is_cache_fresh', return_value=True)
+    def test_fresh_cache_for_longer_period_is_trimmed(self, mock_fresh):
+        cached = self._recent_cache(periods=160, days=160)
+        with patch('_cache.batch_download') as mock_download:
+            histories = load_histories(['USDKRW=X'], None, 150)
+
+        mock_download.assert_not_called()
+        self.assertEqual(len(histories['USDKRW=X']), 150)
+        self.assertEqual(histories['USDKRW=X'].index[-1], cached.index[-1])
+
+    @patch('_cache.is_cache_fresh', return_value=False)
+    def test_incremental_refresh_keeps_longer_cached_period(self, mock_fresh):
+        cached = self._recent_cache(periods=160, days=160)
+        recent = _history(cached.index[-1] + pd.offsets.BDay(), 2, offset=100.0)
+        with patch('_cache.batch_download', return_value={'USDKRW=X': recent}):
+            histories = load_histories(['USDKRW=X'], None, 150)
+
+        self.assertEqual(len(histories['USDKRW=X']), 150)
+        saved = _cache.load_cached('USDKRW=X')
+        self.assertEqual(len(saved), 160)
+        self.assertEqual(_cache.cached_days(saved), 160)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import codecs
+import json
+import os
+import tempfile
+
+from _output import encode_json, write_json
+
+
+class TestOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, 'USD_KRW.json')
+        self.data = {
+            "symbol": "USD/KRW",
+            "timestamp": "2025-05-07T08:00:00.000Z",
+            "lastValue": 1380.25,
+            "signal_short": "횡보",
+        }
+
+    def _read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    # --- Tests for encode_json ---
+    def test_encode_json_matches_json_dumps(self):
+        self.assertEqual(encode_json(self.data), json.dumps(self.data, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    # --- Tests for write_json ---
+    def test_write_json_creates_file_with_bom(self):
+        self.assertTrue(write_json(self.path, self.data, bom=True, volatile_key='timestamp'))
+        self.assertEqual(self._read(), codecs.BOM_UTF8 + encode_json(self.data))
+
+    def test_write_json_skips_identical_content(self):
+        write_json(self.path, self.data)
+        self.assertFalse(write_json(self.path, dict(self.data)))
+
+    def test_write_json_skips_when_only_volatile_key_changes(self):
+        write_json(self.path, self.data, bom=True, volatile_key='timestamp')
+        before = self._read()
+        rerun = {**self.data, "timestamp": "2025-05-07T10:00:00.000Z"}
+
+        self.assertFalse(write_json(self.path, rerun, bom=True, volatile_key='timestamp'))
+        # 건너뛴 경우 기존 파일(이전 실행 시각 포함)이 그대로 유지됨
+        self.assertEqual(self._read(), before)
+
+    def test_write_json_writes_when_other_fields_change(self):
+        write_json(self.path, self.data, volatile_key='timestamp')
+        for key, value in (("lastValue", 1381.0), ("signal_short", "상승 가능"), ("changePercent", 0.1)):
+            changed = {**self.data, key: value, "timestamp": "2025-05-07T10:00:00.000Z"}
+            self.assertTrue(write_json(self.path, changed, volatile_key='timestamp'), key)
+            self.assertEqual(self._read(), encode_json(changed))
+            write_json(self.path, self.data, volatile_key='timestamp')
+
+    def test_write_json_without_volatile_key_writes_timestamp_changes(self):
+        write_json(self.path, self.data)
+        rerun = {**self.data, "timestamp": "2025-05-07T10:00:00.000Z"}
+        self.assertTrue(write_json(self.path, rerun))
+        self.assertEqual(self._read(), encode_json(rerun))
+
+    def test_write_json_overwrites_unreadable_file(self):
+        with open(self.path, 'w') as f:
+            f.write('not json')
+        self.assertTrue(write_json(self.path, self.data, volatile_key='timestamp'))
+        self.assertEqual(self._read(), encode_json(self.data))
+
+
+if __name__ == '__main__':
+    unittest.main()
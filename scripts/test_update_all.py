@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+import update_all
+import update_forex_data
+import update_forex_history
+
+
+def _history(periods, start_price):
+    index = pd.bdate_range(end='2025-05-07', periods=periods)
+    return pd.DataFrame({'Close': start_price + np.linspace(0, 10, periods)}, index=index)
+
+
+class TestUpdateAll(unittest.TestCase):
+
+    def setUp(self):
+        base_rates = {'USD/KRW': 1350.0, 'VND/KRW': 0.055, 'PLN/KRW': 345.0}
+        self.batch = {'USDKRW=X': _history(160, 1300)}
+        self.vnd = _history(160, 0.05)
+
+        patches = [
+            patch('update_all.create_session', return_value=None),
+            patch('update_all.load_base_rates', return_value=base_rates),
+            patch('update_all.load_histories', return_value=self.batch),
+            patch('update_all.fetch_pair_history', side_effect=lambda symbol, session, days: self.vnd if symbol == 'VND/KRW' else None),
+            patch('update_all.save_forex_data'),
+            patch('update_all.save_history_result'),
+        ]
+        mocks = [p.start() for p in patches]
+        for p in patches:
+            self.addCleanup(p.stop)
+        _, _, self.mock_load, self.mock_fetch, self.mock_save_data, self.mock_save_history = mocks
+
+    def test_missing_pairs_are_fetched_once_and_feed_both_outputs(self):
+        with patch('update_forex_data.get_ticker_data') as mock_ticker_data:
+            update_all.main()
+
+        # 일괄 요청은 한 번, 누락된 통화쌍은 통화쌍마다 한 번씩만 수집
+        self.mock_load.assert_called_once()
+        self.assertEqual(sorted(call.args[0] for call in self.mock_fetch.call_args_list), ['PLN/KRW', 'VND/KRW'])
+        mock_ticker_data.assert_not_called()
+
+        data = {call.args[0]: call.args[1] for call in self.mock_save_data.call_args_list}
+        history = {call.args[0]: call.args[1] for call in self.mock_save_history.call_args_list}
+        self.assertEqual(set(data), {'USD/KRW', 'VND/KRW', 'PLN/KRW'})
+        self.assertEqual(set(history), {'USD/KRW', 'VND/KRW'})
+
+        # 두 산출물이 같은 히스토리에서 만들어짐
+        for symbol, hist in (('USD/KRW', self.batch['USDKRW=X']), ('VND/KRW', self.vnd)):
+            self.assertEqual(data[symbol]['lastValue'], history[symbol]['rates'][-1]['rate'])
+            self.assertEqual(len(history[symbol]['rates']), update_all.HISTORY_DAYS)
+            self.assertEqual(history[symbol]['rates'][-1]['timestamp'], hist.index[-1].strftime("%Y-%m-%dT%H:%M:%S.000Z"))
+
+        self.assertEqual(data['PLN/KRW']['signal_short'], "데이터 없음")
+
+    def _saved_data(self):
+        # 실행 시각은 실행마다 다르므로 비교에서 제외
+        saved = {call.args[0]: dict(call.args[1]) for call in self.mock_save_data.call_args_list}
+        return {symbol: {key: value for key, value in data.items() if key != 'timestamp'} for symbol, data in saved.items()}
+
+    def test_update_all_writes_same_data_as_update_forex_data(self):
+        # 앞의 10일만 다른 160일 히스토리: 최근 HISTORY_DAYS일로 자르지 않으면 장기 신호가 달라짐
+        closes = np.full(160, 1300.0)
+        closes[:10] = 1400.0
+        frame = pd.DataFrame({'Close': closes}, index=pd.bdate_range(end='2025-05-07', periods=160))
+        self.batch['USDKRW=X'] = frame
+
+        update_all.main()
+        combined = self._saved_data()
+        self.mock_save_data.reset_mock()
+        update_forex_data.main()
+        standalone = self._saved_data()
+
+        self.assertEqual(combined, standalone)
+        expected = update_forex_data.compute_indicators('USD/KRW', frame.tail(update_all.HISTORY_DAYS), None)
+        del expected['timestamp']
+        self.assertEqual(combined['USD/KRW'], expected)
+        self.assertNotEqual(combined['USD/KRW']['signal_long'],
+                            update_forex_data.compute_indicators('USD/KRW', frame, None)['signal_long'])
+
+    def _fetch_days(self):
+        return {self.mock_load.call_args.args[2]} | {call.args[2] for call in self.mock_fetch.call_args_list}
+
+    def test_update_forex_data_main_writes_only_data(self):
+        update_forex_data.main()
+
+        self.assertEqual(self._fetch_days(), {update_all.HISTORY_DAYS})
+        self.assertEqual({call.args[0] for call in self.mock_save_data.call_args_list}, {'USD/KRW', 'VND/KRW', 'PLN/KRW'})
+        self.mock_save_history.assert_not_called()
+
+    def test_update_forex_history_main_writes_only_history(self):
+        update_forex_history.main()
+
+        self.assertEqual(self._fetch_days(), {update_all.HISTORY_DAYS + update_all.HISTORY_PADDING_DAYS})
+        self.mock_save_data.assert_not_called()
+        # 크로스 환율로만 구할 수 있는 통화쌍도 히스토리가 저장됨
+        self.assertEqual({call.args[0] for call in self.mock_save_history.call_args_list}, {'USD/KRW', 'VND/KRW'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import itertools
+import threading
+import time
+import unittest
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+import update_forex_data
+from update_forex_data import calculate_cross_rate, calculate_signals, calculate_signals_batch, classify_signals, get_usd_leg_close
+
+
+def _history(end, periods, seed):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=end, periods=periods)
+    return pd.DataFrame({'Close': 1300 + rng.normal(0, 3, periods).cumsum()}, index=index)
+
+
+def _legacy_classify(ma5, ma20, ma60, rsi, macd):
+    """조회 테이블 도입 전의 if/elif 신호 규칙 (기준 구현)."""
+    if rsi > 70 and ma5 > ma20:
+        signal_short = "큰 하락 가능"
+    elif rsi < 30 and ma5 < ma20:
+        signal_short = "큰 상승 가능"
+    elif ma5 > ma20:
+        signal_short = "하락 가능"
+    elif ma5 < ma20:
+        signal_short = "상승 가능"
+    else:
+        signal_short = "횡보"
+    
+    if macd > 0 and ma20 > ma60:
+        signal_long = "강한 상승 가능"
+    elif macd < 0 and ma20 < ma60:
+        signal_long = "강한 하락 가능"
+    elif macd > 0:
+        signal_long = "상승 가능"
+    elif macd < 0:
+        signal_long = "하락 가능"
+    else:
+        signal_long = "횡보"
+    
+    return signal_short, signal_long
+
+
+class TestUpdateForexData(unittest.TestCase):
+
+    # --- Tests for classify_signals ---
+    # 경계값(30, 70, 0), 같은 값, NaN을 모두 포함하는 입력 조합
+    MA_VALUES = [np.nan, 1.0, 2.0, 3.0]
+    RSI_VALUES = [np.nan, 10.0, 30.0, 50.0, 70.0, 90.0]
+    MACD_VALUES = [np.nan, -1.0, 0.0, 1.0]
+
+    def _cases(self):
+        return list(itertools.product(self.MA_VALUES, self.MA_VALUES, self.MA_VALUES, self.RSI_VALUES, self.MACD_VALUES))
+
+    def test_classify_signals_matches_legacy_rules(self):
+        covered_short, covered_long = set(), set()
+        for case in self._cases():
+            short, long = classify_signals(*case)
+            self.assertEqual((str(short), str(long)), _legacy_classify(*case), case)
+            covered_short.add(str(short))
+            covered_long.add(str(long))
+        
+        # 모든 신호가 한 번 이상 나오는지 확인
+        self.assertEqual(covered_short, {"큰 하락 가능", "큰 상승 가능", "하락 가능", "상승 가능", "횡보"})
+        self.assertEqual(covered_long, {"강한 상승 가능", "강한 하락 가능", "상승 가능", "하락 가능", "횡보"})
+
+    def test_classify_signals_batched_matches_legacy_rules(self):
+        cases = self._cases()
+        columns = [np.array(values) for values in zip(*cases)]
+        short, long = classify_signals(*columns)
+        self.assertEqual(list(zip(short.tolist(), long.tolist())), [_legacy_classify(*case) for case in cases])
+
+    # --- Tests for calculate_signals_batch ---
+    def test_batch_signals_match_single_pair_signals_when_calendars_differ(self):
+        gapped = _history('2025-01-31', 150, seed=3)
+        histories = {
+            'USD/KRW': _history('2025-01-31', 150, seed=0),
+            'EUR/KRW': _history('2025-01-31', 150, seed=1),
+            # 다른 통화쌍보다 3거래일 뒤처진 히스토리
+            'JPY/KRW': _history('2025-01-28', 150, seed=2),
+            # 중간 날짜가 빠진 히스토리
+            'GBP/KRW': gapped.drop(gapped.index[100:103]),
+            # 시작일이 늦은 짧은 히스토리
+            'CAD/KRW': _history('2025-01-31', 40, seed=4),
+        }
+        batch = calculate_signals_batch(histories)
+
+        self.assertEqual(set(batch), set(histories))
+        for symbol, hist in histories.items():
+            self.assertEqual(batch[symbol], calculate_signals(hist['Close'].to_numpy()), symbol)
+
+    def test_batch_signals_empty(self):
+        self.assertEqual(calculate_signals_batch({}), {})
+
+    # --- Tests for get_usd_leg_close ---
+    def _counting_ticker_data(self, available):
+        fetches = Counter()
+        lock = threading.Lock()
+
+        def fetch(symbol, session, days):
+            with lock:
+                fetches[symbol] += 1
+            # 다른 스레드의 요청과 겹치도록 응답을 늦춤
+            time.sleep(0.05)
+            return _history('2025-01-31', days, seed=len(symbol)) if symbol in available else None
+
+        return fetches, fetch
+
+    def test_cross_rates_in_parallel_fetch_each_usd_leg_once(self):
+        update_forex_data.clear_usd_leg_cache()
+        self.addCleanup(update_forex_data.clear_usd_leg_cache)
+        bases = ['CNY', 'PHP', 'PLN', 'VND']
+        # {통화}USD=X는 없고 USD{통화}=X만 있는 경우
+        fetches, fetch = self._counting_ticker_data({'USDKRW=X'} | {f"USD{base}=X" for base in bases})
+
+        with patch('update_forex_data.get_ticker_data', side_effect=fetch), \
+                ThreadPoolExecutor(max_workers=update_forex_data.MAX_WORKERS) as executor:
+            results = list(executor.map(lambda base: calculate_cross_rate(base, 'KRW', None, 60), bases))
+
+        self.assertTrue(all(result is not None and len(result) == 60 for result in results))
+        self.assertEqual(fetches['USDKRW=X'], 1)
+        self.assertEqual(set(fetches.values()), {1})
+        self.assertEqual(set(fetches), {'USDKRW=X'} | {f"{base}USD=X" for base in bases} | {f"USD{base}=X" for base in bases})
+
+    def test_failed_usd_leg_is_not_cached(self):
+        update_forex_data.clear_usd_leg_cache()
+        self.addCleanup(update_forex_data.clear_usd_leg_cache)
+        fetches, fetch = self._counting_ticker_data({'USDKRW=X'})
+
+        with patch('update_forex_data.get_ticker_data', side_effect=fetch):
+            self.assertIsNone(get_usd_leg_close('USDVND=X', None, 60))
+            self.assertIsNone(get_usd_leg_close('USDVND=X', None, 60))
+            self.assertIsNotNone(get_usd_leg_close('USDKRW=X', None, 60))
+            self.assertIsNotNone(get_usd_leg_close('USDKRW=X', None, 60))
+
+        self.assertEqual(fetches, Counter({'USDVND=X': 2, 'USDKRW=X': 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
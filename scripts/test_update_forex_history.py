@@ -0,0 +1,28 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from update_forex_history import get_forex_history
+
+
+class TestUpdateForexHistory(unittest.TestCase):
+
+    # --- Tests for get_forex_history ---
+    def test_daily_rates_use_python_rounding(self):
+        # np.round(1234.565, 2)는 1234.56이지만 round(1234.565, 2)는 1234.57
+        closes = np.full(70, 1300.0)
+        closes[-1] = 1234.565
+        hist = pd.DataFrame({'Close': closes}, index=pd.bdate_range(end='2025-05-07', periods=70))
+
+        data = get_forex_history('USD/KRW', 60, hist, run_ts='2025-05-07T00:00:00.000Z')
+
+        self.assertEqual(len(data['rates']), 60)
+        self.assertEqual([rate['rate'] for rate in data['rates']], [round(close, 2) for close in closes[-60:].tolist()])
+        self.assertEqual(data['rates'][-1]['rate'], 1234.57)
+        self.assertEqual(data['rates'][-1]['timestamp'], '2025-05-07T00:00:00.000Z')
+        self.assertEqual(data['lastUpdated'], '2025-05-07T00:00:00.000Z')
+
+
+if __name__ == '__main__':
+    unittest.main()
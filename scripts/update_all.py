@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from _cache import load_histories
+from _http import create_session
+from update_forex_data import (
+    HISTORY_DAYS, MAX_WORKERS, calculate_signals_batch, compute_indicators, fetch_pair_history,
+    get_forex_data, load_base_rates, no_data_result, save_forex_data,
+)
+from update_forex_history import get_forex_history, save_history_result
+
+# 히스토리 파일에 추가로 받는 기간 (주말 및 공휴일을 고려)
+HISTORY_PADDING_DAYS = 10
+
+def update(write_data: bool = True, write_history: bool = True,
+           days: int = HISTORY_DAYS + HISTORY_PADDING_DAYS) -> None:
+    """최근 days일 히스토리를 한 번 수집해 환율 데이터(data/)와 히스토리(history/) 중 요청한 산출물을 갱신합니다."""
+    # 모든 산출물이 같은 세션과 같은 일괄 요청 결과를 공유
+    session = create_session()
+    base_rates = load_base_rates()
+    
+    # 이번 실행의 모든 통화쌍에 공통으로 기록할 UTC 타임스탬프
+    run_ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    
+    # 직접 환율은 캐시와 한 번의 일괄 요청으로 수집
+    symbols = list(base_rates.keys())
+    yf_symbols = {symbol: symbol.replace('/', '') + '=X' for symbol in symbols}
+    downloaded = load_histories(list(yf_symbols.values()), session, days)
+    histories = {symbol: downloaded[yf_symbol] for symbol, yf_symbol in yf_symbols.items() if yf_symbol in downloaded}
+    
+    # 일괄 요청에서 누락된 통화쌍은 개별 요청 및 크로스 환율로 한 번씩만 병렬 수집 (세션은 스레드 간 공유)
+    missing = [symbol for symbol in symbols if symbol not in histories]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        fetched = dict(zip(missing, executor.map(lambda symbol: fetch_pair_history(symbol, session, days), missing)))
+    
+    if write_data:
+        # 수집 기간과 관계없이 최근 HISTORY_DAYS일로 잘라 신호 계산 (일괄 수집한 통화쌍은 한 번에 계산)
+        recent = {symbol: hist.tail(HISTORY_DAYS) for symbol, hist in histories.items()}
+        batch_signals = calculate_signals_batch(recent)
+        for symbol, hist in recent.items():
+            save_forex_data(symbol, compute_indicators(symbol, hist, run_ts, batch_signals.get(symbol)))
+        
+        for symbol, hist in fetched.items():
+            if hist is None:
+                print(f"No data available for {symbol}")
+                save_forex_data(symbol, no_data_result(symbol, run_ts))
+            else:
+                save_forex_data(symbol, get_forex_data(symbol, hist.tail(HISTORY_DAYS), run_ts))
+    
+    if write_history:
+        # 같은 히스토리로 추세 예측과 일별 환율 목록 구성
+        for symbol, hist in list(histories.items()) + list(fetched.items()):
+            if hist is None:
+                print(f"No data available for {symbol}")
+                continue
+            save_history_result(symbol, get_forex_history(symbol, HISTORY_DAYS, hist, run_ts))
+
+def main():
+    """환율 데이터(data/)와 히스토리(history/)를 한 번의 수집으로 함께 갱신합니다."""
+    update()
+
+if __name__ == "__main__":
+    main()
@@ -1,181 +1,206 @@
 import json
 import os
 import yfinance as yf
-from datetime import datetime
-import time
+import threading
+from concurrent.futures import Future
 from typing import Dict, Any, Optional, Tuple
-import codecs
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import pandas as pd
 import numpy as np
 
-def create_session() -> requests.Session:
-    """재시도 로직과 적절한 헤더가 포함된 요청 세션을 생성합니다."""
-    session = requests.Session()
+from _cache import (
+    cached_days, covers_days, incremental_start, is_cache_fresh, load_cached, log_stale, merge_history, save_cached,
+)
+from _http import strip_timezone, yahoo_limiter
+from _output import rate_decimals, write_json
+from indicators import signal_indicators
+
+# 동시에 처리할 통화쌍 수
+MAX_WORKERS = 8
+
+# 가져올 히스토리 기간 (일)
+HISTORY_DAYS = 150
+
+# Yahoo Finance에 직접 환율(=X)이 있는 통화쌍 (history/ 수집 결과 기준). 이 통화쌍은 크로스 환율을 시도하지 않음
+DIRECT_OK = frozenset({
+    'AUD/KRW', 'CAD/KRW', 'CHF/KRW', 'EUR/KRW', 'GBP/KRW', 'HKD/KRW',
+    'JPY/KRW', 'NZD/KRW', 'SGD/KRW', 'THB/KRW', 'TWD/KRW', 'USD/KRW',
+})
+
+# 저장소 경로
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_ROOT, 'data')
+BASE_RATES_PATH = os.path.join(REPO_ROOT, 'example', 'base_rates.json')
+os.makedirs(DATA_DIR, exist_ok=True)
+
+def load_base_rates() -> Dict[str, float]:
+    """base_rates.json 파일에서 통화 기본 환율 정보를 로드합니다."""
+    with open(BASE_RATES_PATH, 'r', encoding='utf-8') as f:
+        data = json.load(f)
     
-    # 재시도 설정
-    retry = Retry(
-        total=5,
-        backoff_factor=0.5,
-        status_forcelist=[500, 502, 503, 504],
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
+    return data['base_rates']
+
+def get_ticker_data(symbol: str, session: requests.Session, days: int = HISTORY_DAYS) -> Optional[pd.DataFrame]:
+    """지정된 심볼의 최근 days일 히스토리 데이터를 가져옵니다. 비어 있지 않은 히스토리 응답 자체로 심볼을 검증합니다."""
+    cached = load_cached(symbol)
+    if not covers_days(cached, days):
+        # 더 짧은 기간으로 저장된 캐시는 사용하지 않고 전체 기간을 다시 요청
+        cached = None
+    elif is_cache_fresh(symbol):
+        return cached.tail(days)
     
-    # 브라우저와 유사한 헤더 설정
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-    })
+    # 캐시가 최근이면 마지막 날짜 이후 구간만 요청
+    start = incremental_start(cached)
     
+    # 일시적인 HTTP 오류는 세션의 Retry가 재시도하므로 여기서는 한 번만 요청
     try:
-        # Yahoo Finance 쿠키 획득
-        session.get('https://fc.yahoo.com/')
-        
-        # Crumb 획득 시도
-        crumb_response = session.get('https://query2.finance.yahoo.com/v1/test/getcrumb')
-        if crumb_response.status_code == 200:
-            session.headers.update({'X-Yahoo-Api-Crumb': crumb_response.text})
+        print(f"Fetching {symbol}")
+        yahoo_limiter.wait()
+        ticker = yf.Ticker(symbol, session=session)
+        if start is not None:
+            recent = strip_timezone(ticker.history(start=start.strftime('%Y-%m-%d')))
+        else:
+            hist = strip_timezone(ticker.history(period=f"{days}d"))
     except Exception as e:
-        print(f"Warning: Failed to get Yahoo Finance crumb: {str(e)}")
+        print(f"Error fetching {symbol}: {str(e)}")
+        if start is None:
+            return None
+        recent = None
     
-    return session
-
-def load_base_rates() -> Dict[str, float]:
-    """base_rates.json 파일에서 통화 기본 환율 정보를 로드합니다."""
-    base_rates_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-                                 'example', 'base_rates.json')
+    if start is not None:
+        if recent is None or recent.empty:
+            # 갱신에 실패하면 오래된 캐시를 그대로 쓰되, 다음 실행에서 다시 요청하도록 캐시는 저장하지 않음
+            log_stale(symbol, cached)
+            return cached.tail(days)
+        # 다른 스크립트가 더 긴 기간으로 저장한 캐시라면 그 기간을 유지
+        keep_days = max(days, cached_days(cached))
+        hist = merge_history(cached, recent, keep_days)
+    else:
+        keep_days = days
     
-    with open(base_rates_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if hist.empty or len(hist) <= 1:
+        print(f"No data available for {symbol}")
+        return None
     
-    return data['base_rates']
+    save_cached(symbol, hist, keep_days)
+    return hist.tail(days)
 
-def get_ticker_data(symbol: str, session: requests.Session) -> Optional[Tuple[pd.DataFrame, Any]]:
-    """지정된 심볼에 대한 티커 데이터를 가져옵니다."""
-    for attempt in range(3):
-        try:
-            print(f"Fetching {symbol} (attempt {attempt + 1}/3)")
-            ticker = yf.Ticker(symbol, session=session)
-            hist = ticker.history(period="150d")
-            
-            if not hist.empty and len(hist) > 1:
-                return hist, ticker
-            
-            print(f"No data available for {symbol} on attempt {attempt + 1}")
-            time.sleep(2)
-            
-        except Exception as e:
-            print(f"Error on attempt {attempt + 1} for {symbol}: {str(e)}")
-            if attempt < 2:
-                time.sleep(2)
+# 크로스 환율에 쓰이는 USD 환율 종가: (심볼, 세션, 기간)별로 진행 중이거나 완료된 조회 결과를 공유
+_usd_leg_closes: Dict[Tuple[str, Any, int], Future] = {}
+_usd_leg_lock = threading.Lock()
+
+def clear_usd_leg_cache() -> None:
+    """공유 중인 USD 환율 종가 조회 결과를 비웁니다."""
+    with _usd_leg_lock:
+        _usd_leg_closes.clear()
+
+def get_usd_leg_close(symbol: str, session: requests.Session, days: int = HISTORY_DAYS) -> Optional[pd.Series]:
+    """크로스 환율 계산에 쓰이는 USD 환율 종가를 조회하며, 실행 중 같은 심볼은 스레드 간에 한 번만 요청합니다."""
+    key = (symbol, session, days)
+    with _usd_leg_lock:
+        future = _usd_leg_closes.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = _usd_leg_closes[key] = Future()
     
-    return None
+    # 다른 스레드가 이미 요청 중이면 그 결과를 기다림
+    if not is_owner:
+        return future.result()
+    
+    close = None
+    try:
+        hist = get_ticker_data(symbol, session, days)
+        if hist is not None:
+            close = hist['Close']
+    finally:
+        if close is None:
+            # 일시적인 실패일 수 있으므로 실패 결과는 남기지 않고 이후 호출에서 다시 요청
+            with _usd_leg_lock:
+                del _usd_leg_closes[key]
+        future.set_result(close)
+    return close
 
-def calculate_cross_rate(base_currency: str, quote_currency: str, session: requests.Session) -> Optional[pd.DataFrame]:
+def calculate_cross_rate(base_currency: str, quote_currency: str, session: requests.Session,
+                         days: int = HISTORY_DAYS) -> Optional[pd.DataFrame]:
     """USD를 통한 크로스 환율을 계산합니다."""
     try:
         print(f"Calculating cross rate for {base_currency}/{quote_currency} via USD")
         
         # Base/USD 환율 조회
-        base_usd_symbol = f"{base_currency}USD=X"
-        base_usd_result = get_ticker_data(base_usd_symbol, session)
+        base_close = get_usd_leg_close(f"{base_currency}USD=X", session, days)
         
-        if not base_usd_result:
+        if base_close is None:
             # USD/Base 시도
-            base_usd_symbol = f"USD{base_currency}=X"
-            base_usd_result = get_ticker_data(base_usd_symbol, session)
-            if base_usd_result:
-                base_hist, _ = base_usd_result
-                base_hist['Close'] = 1 / base_hist['Close']
+            base_close = get_usd_leg_close(f"USD{base_currency}=X", session, days)
+            if base_close is not None:
+                base_close = 1 / base_close
             else:
                 print(f"Failed to get {base_currency}/USD rate")
                 return None
-        else:
-            base_hist, _ = base_usd_result
         
         # USD/Quote 환율 조회
-        usd_quote_symbol = f"USD{quote_currency}=X"
-        usd_quote_result = get_ticker_data(usd_quote_symbol, session)
+        quote_close = get_usd_leg_close(f"USD{quote_currency}=X", session, days)
         
-        if not usd_quote_result:
+        if quote_close is None:
             # Quote/USD 시도
-            usd_quote_symbol = f"{quote_currency}USD=X"
-            usd_quote_result = get_ticker_data(usd_quote_symbol, session)
-            if usd_quote_result:
-                quote_hist, _ = usd_quote_result
-                quote_hist['Close'] = 1 / quote_hist['Close']
+            quote_close = get_usd_leg_close(f"{quote_currency}USD=X", session, days)
+            if quote_close is not None:
+                quote_close = 1 / quote_close
             else:
                 print(f"Failed to get USD/{quote_currency} rate")
                 return None
-        else:
-            quote_hist, _ = usd_quote_result
         
-        # 크로스 환율 계산
-        cross_rates = pd.DataFrame()
-        cross_rates['Close'] = base_hist['Close'] * quote_hist['Close']
+        # 두 환율이 모두 있는 날짜만 사용해 배열 곱으로 크로스 환율 계산 (인덱스가 같으면 정렬 생략)
+        if base_close.index.equals(quote_close.index):
+            dates = base_close.index
+            closes = base_close.to_numpy() * quote_close.to_numpy()
+        else:
+            dates = base_close.index.intersection(quote_close.index)
+            closes = base_close.loc[dates].to_numpy() * quote_close.loc[dates].to_numpy()
         
-        return cross_rates
+        return pd.DataFrame({'Close': closes}, index=dates)
     
     except Exception as e:
         print(f"Error calculating cross rate: {str(e)}")
         return None
 
-def calculate_signals(hist: pd.DataFrame) -> Dict[str, str]:
-    """기술적 지표를 계산하고 신호를 생성합니다."""
+# 신호 조회 테이블: 인덱스 = 3 * (첫 번째 지표 상태) + (이동평균 비교 상태)
+# 상태 값은 0 = 아래, 1 = 중립(같거나 비교 불가), 2 = 위
+SIGNAL_SHORT_TABLE = np.array([
+    # RSI < 30: MA5 < MA20, MA5 == MA20, MA5 > MA20
+    "큰 상승 가능", "횡보", "하락 가능",
+    # 30 <= RSI <= 70
+    "상승 가능", "횡보", "하락 가능",
+    # RSI > 70
+    "상승 가능", "횡보", "큰 하락 가능",
+])
+SIGNAL_LONG_TABLE = np.array([
+    # MACD < 0: MA20 < MA60, MA20 == MA60, MA20 > MA60
+    "강한 하락 가능", "하락 가능", "하락 가능",
+    # MACD == 0
+    "횡보", "횡보", "횡보",
+    # MACD > 0
+    "상승 가능", "상승 가능", "강한 상승 가능",
+])
+
+def _compare_state(value, upper, lower) -> np.ndarray:
+    """value > upper이면 2, value < lower이면 0, 그 외(NaN 포함)는 1로 부호화합니다."""
+    value = np.asarray(value)
+    return (value > upper).astype(np.intp) - (value < lower).astype(np.intp) + 1
+
+def classify_signals(ma5, ma20, ma60, rsi, macd) -> Tuple[np.ndarray, np.ndarray]:
+    """기술적 지표 값(스칼라 또는 통화쌍별 배열)으로 단기/장기 신호를 분기 없이 조회합니다."""
+    short_codes = 3 * _compare_state(rsi, 70, 30) + _compare_state(ma5, ma20, ma20)
+    long_codes = 3 * _compare_state(macd, 0, 0) + _compare_state(ma20, ma60, ma60)
+    return np.take(SIGNAL_SHORT_TABLE, short_codes), np.take(SIGNAL_LONG_TABLE, long_codes)
+
+def calculate_signals(closes: np.ndarray) -> Dict[str, str]:
+    """종가 배열로 기술적 지표를 계산하고 신호를 생성합니다."""
     try:
-        # 이동평균 계산
-        ma5 = hist['Close'].rolling(window=min(5, len(hist))).mean().iloc[-1]
-        ma20 = hist['Close'].rolling(window=min(20, len(hist))).mean().iloc[-1]
-        ma60 = hist['Close'].rolling(window=min(60, len(hist))).mean().iloc[-1]
-        
-        # RSI 계산
-        delta = hist['Close'].diff()
-        gain = delta.where(delta > 0, 0).rolling(window=14).mean()
-        loss = -delta.where(delta < 0, 0).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs.iloc[-1])) if loss.iloc[-1] != 0 else 50
-        
-        # MACD 계산
-        if len(hist) >= 26:
-            ema12 = hist['Close'].ewm(span=12, adjust=False).mean()
-            ema26 = hist['Close'].ewm(span=26, adjust=False).mean()
-            macd = (ema12 - ema26).iloc[-1]
-        else:
-            macd = 0.0
-        
-        # 신호 결정
-        if rsi > 70 and ma5 > ma20:
-            signal_short = "큰 하락 가능"
-        elif rsi < 30 and ma5 < ma20:
-            signal_short = "큰 상승 가능"
-        elif ma5 > ma20:
-            signal_short = "하락 가능"
-        elif ma5 < ma20:
-            signal_short = "상승 가능"
-        else:
-            signal_short = "횡보"
-        
-        if macd > 0 and ma20 > ma60:
-            signal_long = "강한 상승 가능"
-        elif macd < 0 and ma20 < ma60:
-            signal_long = "강한 하락 가능"
-        elif macd > 0:
-            signal_long = "상승 가능"
-        elif macd < 0:
-            signal_long = "하락 가능"
-        else:
-            signal_long = "횡보"
-        
+        signal_short, signal_long = classify_signals(*signal_indicators(closes))
         return {
-            "signal_short": signal_short,
-            "signal_long": signal_long
+            "signal_short": str(signal_short),
+            "signal_long": str(signal_long)
         }
     except Exception as e:
         print(f"Error calculating signals: {str(e)}")
@@ -184,85 +209,113 @@ def calculate_signals(hist: pd.DataFrame) -> Dict[str, str]:
             "signal_long": "신호 계산 실패"
         }
 
-def get_forex_data(symbol: str, session: requests.Session) -> Dict[str, Any]:
-    """환율 데이터를 가져옵니다."""
+def calculate_signals_batch(histories: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, str]]:
+    """여러 통화쌍의 기술적 지표를 (날짜 x 통화쌍) 종가 행렬에서 한 번에 계산하고 신호를 생성합니다."""
+    if not histories:
+        return {}
+    
     try:
-        base_currency, quote_currency = symbol.split('/')
-        
-        # 직접 환율 시도
-        direct_symbol = f"{base_currency}{quote_currency}=X"
-        print(f"\nTrying direct rate for {symbol} ({direct_symbol})")
+        # 날짜 인덱스가 완전히 같은 통화쌍끼리만 묶어 (날짜 x 통화쌍) 종가 행렬로 계산
+        # (다른 통화쌍의 달력에 맞춰 채운 값이 섞이지 않도록 정렬/보간하지 않음)
+        groups = {}
+        for symbol, hist in histories.items():
+            groups.setdefault(tuple(hist.index), []).append(symbol)
         
-        ticker_result = get_ticker_data(direct_symbol, session)
-        hist = None
-        
-        if ticker_result:
-            hist, _ = ticker_result
-        else:
-            # 크로스 환율 시도
-            print(f"Direct rate failed for {symbol}, trying cross rate calculation")
-            hist = calculate_cross_rate(base_currency, quote_currency, session)
-        
-        if hist is not None and not hist.empty and len(hist) > 1:
-            last_close = hist['Close'].iloc[-1]
-            prev_close = hist['Close'].iloc[-2]
-            change_percent = ((last_close - prev_close) / prev_close) * 100
-            
-            # 기술적 지표 및 신호 계산
-            signals = calculate_signals(hist)
+        signals = {}
+        for symbols in groups.values():
+            closes = np.column_stack([histories[symbol]['Close'].to_numpy(dtype=np.float64) for symbol in symbols])
             
-            return {
-                "symbol": symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S.000Z"),
-                "lastValue": round(float(last_close), 2),
-                "changePercent": round(float(change_percent), 2),
-                "signal_short": signals["signal_short"],
-                "signal_long": signals["signal_long"]
-            }
-        else:
-            raise ValueError(f"No data available for {symbol}")
+            signal_short, signal_long = classify_signals(*signal_indicators(closes))
+            for symbol, short, long in zip(symbols, signal_short, signal_long):
+                signals[symbol] = {"signal_short": str(short), "signal_long": str(long)}
         
+        return signals
     except Exception as e:
-        print(f"Error fetching data for {symbol}: {str(e)}")
-        return {
-            "symbol": symbol,
-            "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S.000Z"),
-            "lastValue": 0.0,
-            "changePercent": 0.0,
-            "signal_short": "데이터 없음",
-            "signal_long": "데이터 없음"
-        }
+        print(f"Error calculating batch signals: {str(e)}")
+        return {}
 
-def save_forex_data(symbol: str, data: Dict[str, Any]) -> None:
-    """통화 데이터를 JSON 파일로 저장합니다."""
-    output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
-    os.makedirs(output_dir, exist_ok=True)
+def compute_indicators(symbol: str, hist: pd.DataFrame, run_ts: str,
+                       signals: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """히스토리 데이터로부터 최신 환율, 변동률 및 신호를 계산합니다. 미리 계산된 신호가 있으면 사용합니다."""
+    # pandas는 입출력 경계에서만 사용하고, 이후 계산은 연속된 float64 종가 배열로 수행
+    closes = np.ascontiguousarray(hist['Close'].to_numpy(), dtype=np.float64)
     
-    filename = symbol.replace('/', '_') + '.json'
-    file_path = os.path.join(output_dir, filename)
+    last_close = closes[-1]
+    prev_close = closes[-2]
+    change_percent = ((last_close - prev_close) / prev_close) * 100
     
-    with codecs.open(file_path, 'w', encoding='utf-8-sig') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # 기술적 지표 및 신호 계산
+    if signals is None:
+        signals = calculate_signals(closes)
     
-    print(f"데이터가 저장되었습니다: {file_path}")
+    return {
+        "symbol": symbol,
+        "timestamp": run_ts,
+        "lastValue": round(float(last_close), rate_decimals(symbol)),
+        "changePercent": round(float(change_percent), 2),
+        "signal_short": signals["signal_short"],
+        "signal_long": signals["signal_long"]
+    }
 
-def main():
-    # 세션 생성
-    session = create_session()
+def fetch_pair_history(symbol: str, session: requests.Session, days: int = HISTORY_DAYS) -> Optional[pd.DataFrame]:
+    """일괄 요청에서 누락된 통화쌍의 히스토리를 직접 환율, 실패하면 크로스 환율로 가져옵니다."""
+    base_currency, quote_currency = symbol.split('/')
     
-    # 기본 환율 정보 로드
-    base_rates = load_base_rates()
+    # 직접 환율 시도
+    direct_symbol = f"{base_currency}{quote_currency}=X"
+    print(f"\nTrying direct rate for {symbol} ({direct_symbol})")
     
-    # 각 통화쌍에 대해 데이터 수집 및 저장
-    for symbol in base_rates.keys():
-        print(f"\nProcessing {symbol}...")
-        data = get_forex_data(symbol, session)
-        
-        if data:
-            save_forex_data(symbol, data)
+    hist = get_ticker_data(direct_symbol, session, days)
+    
+    if hist is None and symbol in DIRECT_OK:
+        # 직접 환율이 있는 통화쌍의 실패는 일시적인 것이므로 크로스 환율 요청 없이 바로 실패 처리
+        print(f"Direct rate unavailable for {symbol}")
+        return None
+    
+    if hist is None:
+        # 크로스 환율 시도
+        print(f"Direct rate failed for {symbol}, trying cross rate calculation")
+        hist = calculate_cross_rate(base_currency, quote_currency, session, days)
+    
+    if hist is None or hist.empty or len(hist) <= 1:
+        return None
+    return hist
+
+def no_data_result(symbol: str, run_ts: str) -> Dict[str, Any]:
+    """데이터를 가져오지 못한 통화쌍의 기본 결과를 생성합니다."""
+    return {
+        "symbol": symbol,
+        "timestamp": run_ts,
+        "lastValue": 0.0,
+        "changePercent": 0.0,
+        "signal_short": "데이터 없음",
+        "signal_long": "데이터 없음"
+    }
+
+def get_forex_data(symbol: str, hist: pd.DataFrame, run_ts: str) -> Dict[str, Any]:
+    """일괄 요청에서 누락되어 따로 수집한 통화쌍의 히스토리로 환율 데이터를 생성합니다."""
+    try:
+        return compute_indicators(symbol, hist, run_ts)
         
-        # API 호출 제한을 피하기 위한 잠시 대기
-        time.sleep(2)
+    except Exception as e:
+        print(f"Error fetching data for {symbol}: {str(e)}")
+        return no_data_result(symbol, run_ts)
+
+def save_forex_data(symbol: str, data: Dict[str, Any]) -> None:
+    """통화 데이터를 JSON 파일로 저장합니다."""
+    filename = symbol.replace('/', '_') + '.json'
+    file_path = os.path.join(DATA_DIR, filename)
+    
+    # 기존 파일과 동일하게 UTF-8 BOM을 붙여 저장 (실행 시각 외에 바뀐 내용이 없으면 건너뜀)
+    if write_json(file_path, data, bom=True, volatile_key='timestamp'):
+        print(f"데이터가 저장되었습니다: {file_path}")
+    else:
+        print(f"변경 사항이 없어 저장을 건너뜁니다: {file_path}")
+
+def main():
+    # 수집은 update_all과 같은 경로를 사용하고 환율 데이터만 저장 (update_all이 이 모듈을 가져오므로 실행 시점에 import)
+    from update_all import update
+    update(write_history=False, days=HISTORY_DAYS)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,21 +1,26 @@
 import json
 import os
-import yfinance as yf
-from datetime import datetime, timedelta
-import time
-from typing import Dict, Any, List
-import codecs
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
 import numpy as np
+import pandas as pd
+
+from _output import rate_decimals, write_json
+from indicators import sma_tail
+
+# 저장소 경로
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_DIR = os.path.join(REPO_ROOT, 'history')
+BASE_RATES_PATH = os.path.join(REPO_ROOT, 'example', 'base_rates.json')
+os.makedirs(HISTORY_DIR, exist_ok=True)
 
 def calculate_trend_prediction(hist_data) -> Dict[str, Any]:
     """단기/장기 추세를 예측하고 신뢰도를 계산합니다."""
-    closes = hist_data['Close'].values
-    volumes = hist_data['Volume'].values if 'Volume' in hist_data else np.ones_like(closes)
+    closes = np.ascontiguousarray(hist_data['Close'].to_numpy(), dtype=np.float64)
     
-    # 20일 이동평균 계산
-    ma20 = np.mean(closes[-20:])
-    # 60일 이동평균 계산
-    ma60 = np.mean(closes[-60:])
+    # 20일/60일 이동평균 (마지막 구간 평균만 필요하므로 신호 계산과 같은 커널 사용)
+    ma20 = sma_tail(closes, 20)
+    ma60 = sma_tail(closes, 60)
     
     # 최근 가격 변동성
     recent_volatility = np.std(closes[-10:]) / np.mean(closes[-10:]) * 100
@@ -47,57 +52,45 @@ def calculate_trend_prediction(hist_data) -> Dict[str, Any]:
 
 def load_base_rates() -> Dict[str, float]:
     """base_rates.json 파일에서 통화 기본 환율 정보를 로드합니다."""
-    base_rates_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-                                 'example', 'base_rates.json')
-    
-    with open(base_rates_path, 'r', encoding='utf-8') as f:
+    with open(BASE_RATES_PATH, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
     return data['base_rates']
 
-def get_forex_history(symbol: str, days: int = 150) -> Dict[str, Any]:
-    """yfinance를 사용하여 통화의 일별 종가 데이터를 가져옵니다."""
-    # 심볼 형식을 yfinance 형식으로 변환 (USD/KRW -> USDKRW=X)
-    yf_symbol = symbol.replace('/', '') + '=X'
+def get_forex_history(symbol: str, days: int, hist: pd.DataFrame, run_ts: Optional[str] = None) -> Dict[str, Any]:
+    """수집한 히스토리(주말 및 공휴일을 고려해 days일보다 길게 받은 히스토리)로 통화의 일별 종가 데이터를 정리합니다."""
+    # 실행 시각이 주어지지 않으면 현재 UTC 시각을 사용
+    if run_ts is None:
+        run_ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
     
     try:
-        ticker = yf.Ticker(yf_symbol)
-        
-        # days+10일치 데이터를 가져와서 최근 days일만 사용 (주말 및 공휴일을 고려)
-        hist = ticker.history(period=f"{days+10}d")
-        
+        print(f"Processing history for {symbol}...")
         if hist.empty:
             raise ValueError(f"No data found for {symbol}")
         
-        # 날짜별 종가 데이터 추출 (최근 days일만)
-        daily_rates = []
-        
-        # 최근 데이터부터 정렬
-        hist = hist.sort_index(ascending=False)
-        
-        # 추세 예측 계산
+        # 추세 예측 계산 (히스토리는 오래된 날짜가 먼저인 순서)
         trend_data = calculate_trend_prediction(hist)
         
-        # 최대 days일만 가져오기
-        count = 0
-        for date, row in hist.iterrows():
-            if count >= days:
-                break
-                
-            daily_rates.append({
+        # 최근 days일의 종가와 타임스탬프 포맷을 배열 단위로 한 번에 추출한 뒤 일별 환율 목록 구성
+        # (소수 자릿수는 통화쌍별로 한 번만 결정하고, 반올림은 기존 출력과 같도록 Python round()를 사용.
+        #  np.round는 10^decimals를 곱한 뒤 반올림하므로 1234.565처럼 경계에 있는 값에서 결과가 다름)
+        decimals = rate_decimals(symbol)
+        recent = hist.tail(days)
+        closes = recent['Close'].to_numpy(dtype=np.float64).tolist()
+        timestamps = recent.index.strftime("%Y-%m-%dT%H:%M:%S.000Z").tolist()
+        daily_rates = [
+            {
                 "currency_pair": symbol,
-                "rate": round(float(row['Close']), 2),
-                "timestamp": date.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-            })
-            count += 1
-        
-        # 날짜 오름차순으로 다시 정렬 (오래된 날짜가 먼저)
-        daily_rates.reverse()
+                "rate": round(close, decimals),
+                "timestamp": timestamp
+            }
+            for close, timestamp in zip(closes, timestamps)
+        ]
         
         # 결과 데이터 구성
         data = {
             "currency_pair": symbol,
-            "lastUpdated": datetime.now().strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "lastUpdated": run_ts,
             "rates": daily_rates,
             **trend_data  # 추세 예측 데이터 추가
         }
@@ -109,7 +102,7 @@ def get_forex_history(symbol: str, days: int = 150) -> Dict[str, Any]:
         # 오류 발생 시 기본값 반환
         return {
             "currency_pair": symbol,
-            "lastUpdated": datetime.now().strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "lastUpdated": run_ts,
             "rates": [],
             "trend_prediction": {
                 "short_term": {
@@ -127,37 +120,28 @@ def get_forex_history(symbol: str, days: int = 150) -> Dict[str, Any]:
 
 def save_forex_history(symbol: str, data: Dict[str, Any]) -> None:
     """통화의 일별 종가 환율 데이터를 JSON 파일로 저장합니다."""
-    # 데이터를 저장할 디렉토리 확인
-    output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'history')
-    os.makedirs(output_dir, exist_ok=True)
-    
     # 파일 이름 생성 (예: USD_KRW_history.json)
     filename = symbol.replace('/', '_') + '_history.json'
-    file_path = os.path.join(output_dir, filename)
+    file_path = os.path.join(HISTORY_DIR, filename)
     
-    # 데이터 저장 (UTF-8 명시)
-    with codecs.open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
-    print(f"히스토리 데이터가 저장되었습니다: {file_path}")
+    # 데이터 저장 (UTF-8, BOM 없음, 갱신 시각 외에 바뀐 내용이 없으면 건너뜀)
+    if write_json(file_path, data, volatile_key='lastUpdated'):
+        print(f"히스토리 데이터가 저장되었습니다: {file_path}")
+    else:
+        print(f"변경 사항이 없어 저장을 건너뜁니다: {file_path}")
+
+def save_history_result(symbol: str, history_data: Dict[str, Any]) -> None:
+    """일별 환율이 있는 히스토리만 저장합니다."""
+    if history_data and history_data.get('rates'):
+        save_forex_history(symbol, history_data)
+        print(f"Saved {len(history_data['rates'])} days of data for {symbol}")
+    else:
+        print(f"No data available for {symbol}")
 
 def main():
-    # 기본 환율 정보 로드
-    base_rates = load_base_rates()
-    
-    # 각 통화쌍에 대해 히스토리 데이터 수집 및 저장
-    for symbol in base_rates.keys():
-        print(f"Processing history for {symbol}...")
-        history_data = get_forex_history(symbol, days=150)
-        
-        if history_data and history_data.get('rates'):
-            save_forex_history(symbol, history_data)
-            print(f"Saved {len(history_data['rates'])} days of data for {symbol}")
-        else:
-            print(f"No data available for {symbol}")
-        
-        # API 호출 제한을 피하기 위한 대기
-        time.sleep(2)
+    # 수집은 update_all과 같은 경로를 사용하고 히스토리만 저장 (update_all이 이 모듈을 가져오므로 실행 시점에 import)
+    from update_all import update
+    update(write_data=False)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,15 +1,19 @@
 import unittest
 import json
 import os
-from datetime import datetime
+import numpy as np
+from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 
 # Import functions from the script to be tested
 # Assuming fx_updater.py is in the same directory or accessible via PYTHONPATH
 from fx_updater import (
+    sma,
     calculate_moving_average,
     get_predictions,
+    get_predictions_many,
     generate_json_output,
+    format_json_output,
     fetch_fx_data # We will mock this one heavily, or calls within it
 )
 
@@ -44,6 +48,18 @@ class TestFxUpdater(unittest.TestCase):
         # If len(data) - window + 1 is negative, range is empty.
         self.assertEqual(calculate_moving_average([1, 2, 3], -1), [])
 
+    def test_sma_matches_window_means(self):
+        prices = [1300.5, 1301.25, 1299.75, 1302.0, 1303.5, 1301.0, 1300.25]
+        expected = [sum(prices[i:i + 3]) / 3 for i in range(len(prices) - 2)]
+        result = sma(np.asarray(prices), 3)
+        self.assertEqual(len(result), len(expected))
+        for got, want in zip(result, expected):
+            self.assertAlmostEqual(got, want)
+
+    def test_sma_latest_only(self):
+        self.assertEqual(calculate_moving_average([10, 12, 11, 13, 15, 14, 16], 4, latest_only=True), 14.5)
+        self.assertIsNone(calculate_moving_average([1, 2], 3, latest_only=True))
+
     # --- Utility to create mock Alpha Vantage API data ---
     def _create_mock_fx_data(self, num_points, start_price=1300, price_increment_short=1, price_increment_long=0.1, interval_minutes=10):
         """
@@ -55,27 +71,15 @@ class TestFxUpdater(unittest.TestCase):
         """
         fx_data = {}
         current_time = datetime.now()
+
+        # Prices are built once in chronological order.
+        j = np.arange(num_points)
+        increments = np.where(j > num_points / 2, price_increment_short, price_increment_long)
+        prices_chronological = np.cumsum(np.concatenate(([start_price], increments)))[1:].tolist()
+
         for i in range(num_points):
             # Timestamps should be in reverse chronological order as typically returned by API
-            timestamp = (current_time - datetime.timedelta(minutes=i * interval_minutes)).strftime("%Y-%m-%d %H:%M:%S")
-            
-            # Simplified price generation for basic trend control
-            # This is a simplistic model; real MA behavior depends on the entire series.
-            # For UP: Make more recent prices higher
-            # For DOWN: Make more recent prices lower
-            # This needs to be carefully crafted. Let's assume for UP, short MA > medium MA > long MA.
-            # This means the most recent prices (which are at the 'end' of the chronological list fed to SMA)
-            # need to be higher than older prices.
-            # price = start_price + (num_points - 1 - i) * price_increment_short + (num_points - 1 - i) * price_increment_long
-            
-            # Let's try a simpler approach: define a list of prices and then assign to timestamps.
-            # Prices list should be in chronological order for this logic
-            prices_chronological = []
-            base = start_price
-            for j in range(num_points):
-                # This is a placeholder. Specific tests will override this with more controlled data.
-                base += price_increment_short if j > num_points / 2 else price_increment_long
-                prices_chronological.append(base)
+            timestamp = (current_time - timedelta(minutes=i * interval_minutes)).strftime("%Y-%m-%d %H:%M:%S")
 
             # API returns newest first, so we map prices in reverse from our chronological list
             price = prices_chronological[num_points - 1 - i]
@@ -99,11 +103,11 @@ class TestFxUpdater(unittest.TestCase):
         mock_data_points = {}
         start_time = datetime(2023, 1, 1, 10, 0, 0)
         for i, price in enumerate(prices): # prices are chronological
-            # API data is reverse chronological for timestamps
-            ts = (start_time + datetime.timedelta(minutes=(len(prices)-1-i)*10)).strftime("%Y-%m-%d %H:%M:%S")
+            # Timestamps follow the chronological order of the prices
+            ts = (start_time + timedelta(minutes=i*10)).strftime("%Y-%m-%d %H:%M:%S")
             mock_data_points[ts] = {"1. open": str(price), "2. high": str(price), "3. low": str(price), "4. close": str(price)}
         
-        mock_fetch.return_value = {"Time Series FX (10min)": mock_data_points}
+        mock_fetch.return_value = mock_data_points
 
         latest_rate, short_pred, long_pred, ts = get_predictions("fake_api_key", "USD", "KRW")
         
@@ -121,10 +125,10 @@ class TestFxUpdater(unittest.TestCase):
         mock_data_points = {}
         start_time = datetime(2023, 1, 1, 10, 0, 0)
         for i, price in enumerate(prices): # prices are chronological
-            ts = (start_time + datetime.timedelta(minutes=(len(prices)-1-i)*10)).strftime("%Y-%m-%d %H:%M:%S")
+            ts = (start_time + timedelta(minutes=i*10)).strftime("%Y-%m-%d %H:%M:%S")
             mock_data_points[ts] = {"1. open": str(price), "2. high": str(price), "3. low": str(price), "4. close": str(price)}
 
-        mock_fetch.return_value = {"Time Series FX (10min)": mock_data_points}
+        mock_fetch.return_value = mock_data_points
         latest_rate, short_pred, long_pred, ts = get_predictions("fake_api_key", "USD", "KRW")
 
         self.assertIsNotNone(latest_rate)
@@ -140,10 +144,10 @@ class TestFxUpdater(unittest.TestCase):
         mock_data_points = {}
         start_time = datetime(2023, 1, 1, 10, 0, 0)
         for i, price in enumerate(prices):
-            ts = (start_time + datetime.timedelta(minutes=(len(prices)-1-i)*10)).strftime("%Y-%m-%d %H:%M:%S")
+            ts = (start_time + timedelta(minutes=i*10)).strftime("%Y-%m-%d %H:%M:%S")
             mock_data_points[ts] = {"1. open": str(price), "2. high": str(price), "3. low": str(price), "4. close": str(price)}
 
-        mock_fetch.return_value = {"Time Series FX (10min)": mock_data_points}
+        mock_fetch.return_value = mock_data_points
         latest_rate, short_pred, long_pred, ts = get_predictions("fake_api_key", "USD", "KRW")
 
         self.assertIsNotNone(latest_rate)
@@ -171,10 +175,10 @@ class TestFxUpdater(unittest.TestCase):
         mock_data_points = {}
         start_time = datetime(2023, 1, 1, 10, 0, 0)
         for i, price in enumerate(prices):
-            ts = (start_time + datetime.timedelta(minutes=(len(prices)-1-i)*10)).strftime("%Y-%m-%d %H:%M:%S")
+            ts = (start_time + timedelta(minutes=i*10)).strftime("%Y-%m-%d %H:%M:%S")
             mock_data_points[ts] = {"1. open": str(price), "2. high": str(price), "3. low": str(price), "4. close": str(price)}
 
-        mock_fetch.return_value = {"Time Series FX (10min)": mock_data_points}
+        mock_fetch.return_value = mock_data_points
         latest_rate, short_pred, long_pred, ts = get_predictions("fake_api_key", "USD", "KRW")
 
         # latest_rate should still be available
@@ -184,6 +188,47 @@ class TestFxUpdater(unittest.TestCase):
         self.assertEqual(long_pred, "NEUTRAL")
         self.assertIsNotNone(ts)
 
+    @patch('fx_updater.fetch_fx_data')
+    def test_get_predictions_many(self, mock_fetch):
+        prices = [150.0] * 60
+        start_time = datetime(2023, 1, 1, 10, 0, 0)
+        mock_data_points = {}
+        for i, price in enumerate(prices):
+            ts = (start_time + timedelta(minutes=i*10)).strftime("%Y-%m-%d %H:%M:%S")
+            mock_data_points[ts] = {"1. open": str(price), "2. high": str(price), "3. low": str(price), "4. close": str(price)}
+        mock_fetch.return_value = mock_data_points
+
+        results = get_predictions_many("fake_api_key", [("USD", "KRW"), ("EUR", "KRW")])
+
+        self.assertEqual(set(results), {("USD", "KRW"), ("EUR", "KRW")})
+        for latest_rate, short_pred, long_pred, ts in results.values():
+            self.assertEqual(latest_rate, 150.0)
+            self.assertEqual(short_pred, "NEUTRAL")
+            self.assertEqual(long_pred, "NEUTRAL")
+        self.assertEqual(mock_fetch.call_count, 2)
+        # Both pairs share the same session
+        sessions = {call.kwargs['session'] for call in mock_fetch.call_args_list}
+        self.assertEqual(len(sessions), 1)
+
+    @patch('fx_updater.fetch_fx_data')
+    def test_get_predictions_skips_malformed_points(self, mock_fetch):
+        prices = [150.0] * 60
+        start_time = datetime(2023, 1, 1, 10, 0, 0)
+        mock_data_points = {}
+        for i, price in enumerate(prices):
+            ts = (start_time + timedelta(minutes=i*10)).strftime("%Y-%m-%d %H:%M:%S")
+            mock_data_points[ts] = {"1. open": str(price), "2. high": str(price), "3. low": str(price), "4. close": str(price)}
+        mock_data_points["2023-01-01 09:40:00"] = {"1. open": "150.0"}
+        mock_data_points["2023-01-01 09:50:00"] = {"4. close": "n/a"}
+        mock_fetch.return_value = mock_data_points
+
+        latest_rate, short_pred, long_pred, ts = get_predictions("fake_api_key", "USD", "KRW")
+
+        self.assertEqual(latest_rate, 150.0)
+        self.assertEqual(short_pred, "NEUTRAL")
+        self.assertEqual(long_pred, "NEUTRAL")
+        self.assertEqual(ts, (start_time + timedelta(minutes=590)).strftime("%Y-%m-%d %H:%M:%S"))
+
     # --- Tests for generate_json_output ---
     def test_generate_json_valid_input(self):
         timestamp_str = "2023-10-27 10:00:00"
@@ -230,5 +275,12 @@ class TestFxUpdater(unittest.TestCase):
         self.assertEqual(result_dict, expected_json)
 
 
+    # --- Tests for format_json_output ---
+    def test_format_json_matches_json_dumps(self):
+        for latest_rate in (150.25, 1375.0, None):
+            args = (latest_rate, "UP", "NEUTRAL", "USD", "KRW", "2023-10-27 10:00:00")
+            self.assertEqual(format_json_output(*args), json.dumps(generate_json_output(*args), indent=4))
+
+
 if __name__ == '__main__':
     unittest.main()